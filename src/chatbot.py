@@ -1,11 +1,25 @@
 import ollama
+import atexit
 import os
 import json
 import re
+import threading
 from typing import Dict, List, Optional
 from prompts import PromptTemplates
+from utils import CandidateIndex, QuestionIndex
 
 class HiringAssistant:
+    # Shared across sessions so candidates with similar stacks get varied questions
+    question_index = None
+    candidate_index = None
+    _question_index_lock = threading.Lock()
+    _candidate_index_lock = threading.Lock()
+    _questions_since_save = 0
+    
+    MIN_QUESTIONS = 3
+    QUESTION_INDEX_SAVE_EVERY = 20
+    QUESTION_PATTERN = re.compile(r'^\s*\d+[.)]\s+(.*)')
+
     def __init__(self):
         """Initialize the hiring assistant with Ollama local LLM."""
         # Initialize prompts and conversation state
@@ -81,6 +95,8 @@ class HiringAssistant:
                 return self.handle_info_collection(user_input)
             elif self.conversation_state == "tech_questions":
                 return self.handle_tech_questions(user_input)
+            elif self.conversation_state == "completed":
+                return self.handle_completed(user_input)
             else:
                 return self.handle_fallback(user_input)
         except Exception as e:
@@ -114,6 +130,12 @@ class HiringAssistant:
             
             # Check if we have sufficient information to proceed
             if self.has_sufficient_info():
+                # Skip screening for candidates already on file, without confirming the match.
+                # Checked only on complete info, so a partial extraction can't end the session.
+                if self.is_known_candidate():
+                    self.conversation_state = "completed"
+                    return self.prompts.get_screening_complete_prompt()
+                
                 self.conversation_state = "tech_questions"
                 return self.generate_acknowledgment_and_questions()
             else:
@@ -147,13 +169,16 @@ Please extract any new information and return a structured response."""
             }
         )
         
-        # Extract content from response properly
+        return self.get_response_content(response, "Could not extract information.")
+    
+    def get_response_content(self, response, default: str) -> str:
+        """Read the message content from an Ollama chat response object or dict."""
         if hasattr(response, 'message') and hasattr(response.message, 'content'):
             return response.message.content
         elif isinstance(response, dict):
-            return response.get('message', {}).get('content', '')
+            return response.get('message', {}).get('content', default)
         else:
-            return "Could not extract information."
+            return default
     
     def parse_extraction_response(self, response: str) -> Dict:
         """Parse the LLM's extraction response into structured data."""
@@ -203,6 +228,29 @@ Please extract any new information and return a structured response."""
                 else:
                     self.candidate_info[key] = value
     
+    @classmethod
+    def get_candidate_index(cls) -> Optional[CandidateIndex]:
+        """Return the shared index of known candidates when CANDIDATE_INDEX_PATH is set."""
+        with cls._candidate_index_lock:
+            if cls.candidate_index is None:
+                index_path = os.getenv('CANDIDATE_INDEX_PATH')
+                if index_path:
+                    cls.candidate_index = CandidateIndex(index_path, key=os.getenv('CANDIDATE_INDEX_KEY'))
+            return cls.candidate_index
+    
+    def is_known_candidate(self) -> bool:
+        """Check whether the candidate's email or phone is already on file."""
+        index = self.get_candidate_index()
+        if index is None:
+            return False
+        return index.lookup(self.candidate_info.get('email'), self.candidate_info.get('phone')) is not None
+    
+    def register_candidate(self):
+        """Record a screened candidate's contact details so repeat screenings are skipped."""
+        index = self.get_candidate_index()
+        if index is not None:
+            index.add(self.candidate_info.get('email'), self.candidate_info.get('phone'))
+    
     def has_sufficient_info(self) -> bool:
         """FIXED: Better logic for determining information completeness."""
         required_fields = ['name', 'email', 'experience', 'tech_stack']
@@ -297,20 +345,173 @@ Please extract any new information and return a structured response."""
                 }
             )
             
-            # Extract content properly
-            if hasattr(response, 'message') and hasattr(response.message, 'content'):
-                questions = response.message.content
-            elif isinstance(response, dict):
-                questions = response.get('message', {}).get('content', 'Could not generate questions.')
-            else:
-                questions = "Could not generate questions at this time."
-                
-            return questions
+            questions = self.get_response_content(response, "Could not generate questions at this time.")
+            return self.diversify_questions(questions)
             
         except Exception as e:
             print(f"Error in generate_tech_questions: {e}")
             return "I'll prepare some technical questions based on your experience with Python, Django, and React. Please tell me about a challenging project you've worked on."
     
+    @classmethod
+    def get_question_index(cls) -> QuestionIndex:
+        """Return the shared index of issued questions, persisted if configured."""
+        with cls._question_index_lock:
+            if cls.question_index is None:
+                index_path = os.getenv('QUESTION_INDEX_PATH')
+                if index_path and os.path.exists(index_path):
+                    index = QuestionIndex.load(index_path)
+                else:
+                    index = QuestionIndex()
+                if index_path:
+                    atexit.register(index.save, index_path)
+                cls.question_index = index
+            return cls.question_index
+    
+    @classmethod
+    def record_issued_questions(cls, signatures: List):
+        """Add issued questions to the index, saving it every few questions."""
+        if not signatures:
+            return
+        index = cls.get_question_index()
+        index.add_signatures(signatures)
+        
+        index_path = os.getenv('QUESTION_INDEX_PATH')
+        with cls._question_index_lock:
+            cls._questions_since_save += len(signatures)
+            if not index_path or cls._questions_since_save < cls.QUESTION_INDEX_SAVE_EVERY:
+                return
+            cls._questions_since_save = 0
+            # Saved under the lock so concurrent sessions don't race on the temp file
+            index.save(index_path)
+    
+    def split_numbered_questions(self, text: str) -> tuple:
+        """Split a numbered list into header lines, question items, footer lines and item gap.
+        
+        Each item holds the text after the number followed by its continuation lines,
+        so a heading on the numbered line keeps the question written below it. The last
+        item ends at a blank line followed by unindented text, which is the footer.
+        """
+        lines = text.split('\n')
+        starts = [i for i, line in enumerate(lines) if self.QUESTION_PATTERN.match(line)]
+        if not starts:
+            return lines, [], [], 0
+        
+        items, footer, gap = [], [], 0
+        for n, start in enumerate(starts):
+            end = starts[n + 1] if n + 1 < len(starts) else len(lines)
+            item = [self.QUESTION_PATTERN.match(lines[start]).group(1)] + lines[start + 1:end]
+            if n == len(starts) - 1:
+                for j in range(1, len(item)):
+                    following = [line for line in item[j:] if line.strip()]
+                    if not item[j].strip() and (not following or not following[0][0].isspace()):
+                        item, footer = item[:j], item[j:]
+                        break
+            blanks = len(item) - len(self.strip_trailing_blank_lines(item))
+            if n == 0 and len(starts) > 1:
+                gap = blanks
+            items.append(item[:len(item) - blanks])
+        return lines[:starts[0]], items, footer, gap
+    
+    @staticmethod
+    def strip_trailing_blank_lines(lines: List[str]) -> List[str]:
+        """Drop blank lines from the end of a list of lines."""
+        end = len(lines)
+        while end and not lines[end - 1].strip():
+            end -= 1
+        return lines[:end]
+    
+    @staticmethod
+    def question_text(item: List[str]) -> str:
+        """Join a question item's lines into one line of text."""
+        return ' '.join(line.strip() for line in item if line.strip())
+    
+    def select_novel_questions(self, items: List[List[str]], seen: List) -> tuple:
+        """Split question items into novel ones and repeats of previously issued ones.
+        
+        Each item is also checked against ``seen`` signatures, so near-duplicates
+        within one set are skipped. Returns ([(item, signature)], [(item, score)]).
+        """
+        index = self.get_question_index()
+        novel, repeats = [], []
+        for item in items:
+            signature = index.signature(self.question_text(item))
+            if any(index.similarity(signature, other) >= index.threshold for other in seen):
+                continue
+            seen.append(signature)
+            match = index.query_signature(signature)
+            if match:
+                repeats.append((item, match[1]))
+            else:
+                novel.append((item, signature))
+        return novel, repeats
+    
+    def request_replacement_questions(self, count: int, avoid: List[str]) -> List[List[str]]:
+        """Ask the model for questions to replace ones that were already issued."""
+        if not self.ollama_available:
+            return []
+        tech_stack = self.candidate_info.get('tech_stack', [])
+        experience = self.candidate_info.get('experience', '5 years')
+        
+        try:
+            response = ollama.chat(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": self.prompts.get_question_generation_prompt(
+                        tech_stack=', '.join(tech_stack),
+                        experience=experience
+                    )},
+                    {"role": "user", "content": self.prompts.get_replacement_questions_prompt(count, avoid)}
+                ],
+                stream=False,
+                options={
+                    "temperature": 0.9,  # Higher temperature to move away from repeats
+                    "num_predict": 300
+                }
+            )
+            
+            return self.split_numbered_questions(self.get_response_content(response, ''))[1]
+        
+        except Exception as e:
+            print(f"Error in request_replacement_questions: {e}")
+            return []
+    
+    def diversify_questions(self, questions: str) -> str:
+        """Swap out questions that near-duplicate ones already issued to other candidates.
+        
+        Repeats are replaced by newly requested questions where possible. When too few
+        novel questions remain, the least similar repeats are kept to reach MIN_QUESTIONS,
+        and when none remain the original text is returned unchanged.
+        """
+        header, original, footer, gap = self.split_numbered_questions(questions)
+        if not original:
+            return questions
+        
+        seen = []
+        novel, repeats = self.select_novel_questions(original, seen)
+        if len(novel) < len(original) and len(novel) < self.MIN_QUESTIONS:
+            replacements = self.request_replacement_questions(
+                len(original) - len(novel), [self.question_text(item) for item in original]
+            )
+            more, _ = self.select_novel_questions(replacements, seen)
+            novel += more[:len(original) - len(novel)]
+        if not novel:
+            return questions
+        
+        # Repeats are already in the index, so only novel questions are recorded
+        self.record_issued_questions([signature for _, signature in novel])
+        
+        kept = [item for item, _ in novel]
+        repeats.sort(key=lambda entry: entry[1])
+        kept += [item for item, _ in repeats[:max(0, self.MIN_QUESTIONS - len(kept))]]
+        
+        body = []
+        for number, item in enumerate(kept, 1):
+            if number > 1:
+                body += [''] * gap
+            body.append(f"{number}. {item[0]}")
+            body += item[1:]
+        return '\n'.join(header + body + footer)
+    
     def build_conversation_context(self) -> str:
         """Build context from conversation history."""
         context_parts = []
@@ -327,8 +528,15 @@ Please extract any new information and return a structured response."""
     
     def handle_tech_questions(self, user_input: str) -> str:
         """Handle responses to technical questions."""
+        # Only candidates who finished screening are registered
+        self.register_candidate()
+        self.conversation_state = "completed"
         return "Thank you for your detailed responses! Our team will review your information and technical answers. We'll get back to you within 2-3 business days with next steps in the interview process."
     
+    def handle_completed(self, user_input: str) -> str:
+        """Respond to messages after the screening has finished."""
+        return self.prompts.get_screening_complete_prompt()
+    
     def handle_fallback(self, user_input: str) -> str:
         """Fallback response for unexpected inputs."""
         return self.prompts.get_fallback_prompt()
\ No newline at end of file
@@ -122,6 +122,16 @@ EXAMPLE STRUCTURE:
 
 Keep questions professional but conversational, as this is a friendly screening interview."""
     
+    def get_replacement_questions_prompt(self, count: int, avoid: list) -> str:
+        """Request fresh questions that differ from ones already asked"""
+        avoid_text = '\n'.join(f"- {question}" for question in avoid)
+        return f"""Generate {count} new technical question(s) for this candidate.
+
+They must be clearly different in topic and wording from these questions:
+{avoid_text}
+
+Present them as a numbered list, with no other text."""
+    
     def get_fallback_prompt(self) -> str:
         """Fallback response for unexpected inputs"""
         return """
@@ -134,6 +144,15 @@ I'm here to:
 * Help with the initial screening process
 
 Could you please rephrase your response, or let me know if you'd like to continue with the screening process?
+"""
+    
+    def get_screening_complete_prompt(self) -> str:
+        """Closing message once no further screening is needed"""
+        return """
+Thank you! We have everything we need for now. 🙏
+
+Our team will review your information and be in touch within 2-3 business days
+with next steps. You can close this chat at any time.
 """
     
     def get_goodbye_prompt(self) -> str:
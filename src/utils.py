@@ -2,8 +2,20 @@
 Utility functions for the hiring assistant
 """
 
+import csv
+import hashlib
+import os
 import re
-from typing import Dict, List, Optional
+import sqlite3
+import threading
+import zlib
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+NON_DIGITS = re.compile(r'\D')
 
 class DataValidator:
     """Validate and clean user input data"""
@@ -11,16 +23,26 @@ class DataValidator:
     @staticmethod
     def is_valid_email(email: str) -> bool:
         """Check if email format is valid"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return EMAIL_PATTERN.match(email) is not None
     
     @staticmethod
     def is_valid_phone(phone: str) -> bool:
         """Check if phone number format is reasonable"""
-        # Remove all non-digits
-        digits_only = re.sub(r'\D', '', phone)
         # Check if it's between 10-15 digits (international format)
-        return 10 <= len(digits_only) <= 15
+        return 10 <= len(DataValidator.normalize_phone(phone)) <= 15
+    
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        """Case-fold an email and strip any +tag that follows a non-empty local part"""
+        local, _, domain = email.strip().casefold().rpartition('@')
+        if not local:
+            return domain
+        return f"{local.split('+', 1)[0] or local}@{domain}"
+    
+    @staticmethod
+    def normalize_phone(phone: str) -> str:
+        """Reduce a phone number to its digits"""
+        return NON_DIGITS.sub('', phone)
     
     @staticmethod
     def clean_text(text: str) -> str:
@@ -64,3 +86,401 @@ class TechStackExtractor:
             'frameworks': found_frameworks,
             'databases': found_databases
         }
+
+class QuestionIndex:
+    """Detect near-duplicate interview questions with MinHash + LSH.
+
+    Each question is reduced to a signature of ``num_perm`` 16-bit minimum
+    hashes over its word unigrams and bigrams. Signatures live in one compact uint16
+    array, and every band of ``rows`` hashes is packed losslessly into a
+    uint64 key kept in a sorted array per band, so a lookup costs a few
+    binary searches plus a vectorized comparison of the candidates found.
+    Lookups, inserts and saves are serialized with a lock, so one index
+    can be shared across sessions.
+    """
+
+    MERGE_THRESHOLD = 4096
+    _TOKEN_PATTERN = re.compile(r'[a-z0-9+#.]+')
+
+    def __init__(self, num_perm: int = 30, rows: int = 3,
+                 threshold: float = 0.6, seed: int = 1):
+        if num_perm % rows or rows > 4:
+            raise ValueError("num_perm must be a multiple of rows, and rows at most 4")
+        self.num_perm = num_perm
+        self.rows = rows
+        self.bands = num_perm // rows
+        self.threshold = threshold
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        self._perm_a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._perm_b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._shifts = (np.arange(rows, dtype=np.uint64) * np.uint64(16))
+
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint16)
+        self._size = 0
+        # Per band: sorted keys with matching ids, plus a small unsorted tail
+        self._sorted_keys = [np.empty(0, dtype=np.uint64) for _ in range(self.bands)]
+        self._sorted_ids = [np.empty(0, dtype=np.uint32) for _ in range(self.bands)]
+        self._pending_keys = np.empty((self.MERGE_THRESHOLD, self.bands), dtype=np.uint64)
+        self._pending_start = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by signatures and band lookup arrays"""
+        with self._lock:
+            total = self._signatures[:self._size].nbytes
+            total += sum(k.nbytes + i.nbytes for k, i in zip(self._sorted_keys, self._sorted_ids))
+            return total
+
+    def _shingles(self, text: str) -> set:
+        """Word unigrams plus bigrams, so rewording keeps most of the set"""
+        tokens = self._TOKEN_PATTERN.findall(text.lower())
+        shingles = set(tokens)
+        shingles.update(' '.join(pair) for pair in zip(tokens, tokens[1:]))
+        return shingles or {''}
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a question"""
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in self._shingles(text)),
+            dtype=np.uint64
+        )
+        permuted = (hashes[:, None] * self._perm_a + self._perm_b) & np.uint64(0xFFFFFFFF)
+        return (permuted.min(axis=0) & np.uint64(0xFFFF)).astype(np.uint16)
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Pack each band of 16-bit hashes into one uint64 key per band"""
+        banded = signatures.reshape(-1, self.bands, self.rows).astype(np.uint64)
+        return np.bitwise_or.reduce(banded << self._shifts, axis=2)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimate the similarity of two questions from their signatures"""
+        return float((first == second).mean())
+
+    def add(self, text: str) -> int:
+        """Store a question and return its id"""
+        return self.add_signatures(self.signature(text)[None, :])[0]
+
+    def add_many(self, texts: List[str]) -> List[int]:
+        """Store several questions at once"""
+        if not texts:
+            return []
+        return self.add_signatures(np.stack([self.signature(t) for t in texts]))
+
+    def add_signatures(self, signatures) -> List[int]:
+        """Store precomputed signatures, an array or a list of rows, and return their ids"""
+        signatures = np.asarray(signatures, dtype=np.uint16)
+        with self._lock:
+            return self._add_signatures(signatures)
+
+    def _add_signatures(self, signatures: np.ndarray) -> List[int]:
+        count = len(signatures)
+        needed = self._size + count
+        if needed > len(self._signatures):
+            capacity = max(needed, 2 * len(self._signatures))
+            grown = np.empty((capacity, self.num_perm), dtype=np.uint16)
+            grown[:self._size] = self._signatures[:self._size]
+            self._signatures = grown
+
+        start = self._size
+        self._signatures[start:needed] = signatures
+        self._size = needed
+        if needed - self._pending_start >= self.MERGE_THRESHOLD:
+            self._merge_pending()
+        else:
+            self._pending_keys[start - self._pending_start:needed - self._pending_start] = \
+                self._band_keys(signatures)
+        return list(range(start, needed))
+
+    def _merge_pending(self):
+        """Fold the unsorted tail into the sorted per-band arrays"""
+        if self._size == self._pending_start:
+            return
+        keys = self._band_keys(self._signatures[self._pending_start:self._size])
+        ids = np.arange(self._pending_start, self._size, dtype=np.uint32)
+        for band in range(self.bands):
+            merged_keys = np.concatenate((self._sorted_keys[band], keys[:, band]))
+            merged_ids = np.concatenate((self._sorted_ids[band], ids))
+            # Stable sort of two sorted runs is a linear merge
+            order = np.argsort(merged_keys, kind='stable')
+            self._sorted_keys[band] = merged_keys[order]
+            self._sorted_ids[band] = merged_ids[order]
+        self._pending_start = self._size
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        found = []
+        for band in range(self.bands):
+            sorted_keys = self._sorted_keys[band]
+            lo = np.searchsorted(sorted_keys, keys[band], side='left')
+            hi = np.searchsorted(sorted_keys, keys[band], side='right')
+            if hi > lo:
+                found.append(self._sorted_ids[band][lo:hi])
+        pending = self._pending_keys[:self._size - self._pending_start]
+        if len(pending):
+            hits = np.nonzero((pending == keys).any(axis=1))[0]
+            if len(hits):
+                found.append((hits + self._pending_start).astype(np.uint32))
+        if not found:
+            return np.empty(0, dtype=np.uint32)
+        return np.unique(np.concatenate(found))
+
+    def query(self, text: str) -> Optional[Tuple[int, float]]:
+        """Return (id, estimated similarity) of the closest stored near-duplicate"""
+        return self.query_signature(self.signature(text))
+
+    def query_signature(self, signature: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Like ``query``, for a precomputed signature"""
+        keys = self._band_keys(signature[None, :])[0]
+        with self._lock:
+            candidates = self._candidates(keys)
+            if not len(candidates):
+                return None
+            scores = (self._signatures[candidates] == signature).mean(axis=1)
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        return int(candidates[best]), float(scores[best])
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check whether a similar question was already issued"""
+        return self.query(text) is not None
+
+    def save(self, path: str):
+        """Persist the stored signatures to an .npz file, replacing it atomically"""
+        with self._lock:
+            signatures = self._signatures[:self._size].copy()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                signatures=signatures,
+                params=np.array([self.num_perm, self.rows, self.seed]),
+                threshold=np.array(self.threshold)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'QuestionIndex':
+        """Rebuild an index saved with ``save``"""
+        with np.load(path) as data:
+            num_perm, rows, seed = (int(v) for v in data['params'])
+            index = cls(num_perm=num_perm, rows=rows,
+                        threshold=float(data['threshold']), seed=seed)
+            index.add_signatures(data['signatures'])
+        return index
+
+
+class CandidateIndex:
+    """Persistent index of normalized candidate emails and phones.
+
+    Keys are stored as 64-bit BLAKE2 hashes in an SQLite integer primary
+    key, so lookups stay constant-cost on disk and memory stays flat however
+    many candidates are stored. With a secret ``key`` the hashes are keyed,
+    so the file cannot be reversed by hashing guessed emails or phones
+    without the secret. Without one they are only pseudonymized. The index
+    records a check value for its key and refuses to open with another one.
+    Candidate ids come from a counter row, and each registration runs as
+    one locked write transaction, so concurrent sessions and imports never
+    hand out the same id.
+    """
+
+    _IN_CHUNK = 500
+
+    def __init__(self, path: str = ':memory:', key: Optional[str] = None):
+        # Secrets of any length are reduced to the 64 bytes BLAKE2 accepts as a key
+        self._key = hashlib.blake2b(key.encode('utf-8')).digest() if key else b''
+        # Transactions are managed explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS candidate_keys '
+                '(key_hash INTEGER PRIMARY KEY, candidate_id INTEGER NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS candidate_meta '
+                '(name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO candidate_meta (name, value) VALUES ('next_candidate_id', 0)"
+            )
+            key_check = self._hash('key-check')
+            self._conn.execute(
+                "INSERT OR IGNORE INTO candidate_meta (name, value) VALUES ('key_check', ?)",
+                (key_check,)
+            )
+            stored_check = self._conn.execute(
+                "SELECT value FROM candidate_meta WHERE name = 'key_check'"
+            ).fetchone()[0]
+        if stored_check != key_check:
+            self._conn.close()
+            raise ValueError(f"Candidate index {path} was created with a different key")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._next_candidate_id()
+
+    def _hash(self, value: str) -> int:
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8, key=self._key).digest()
+        return int.from_bytes(digest, 'big', signed=True)
+
+    def candidate_keys(self, email: Optional[str] = None, phone: Optional[str] = None) -> List[int]:
+        """Hash the valid, normalized contact details of a candidate"""
+        keys = []
+        if email and EMAIL_PATTERN.match(email.strip()):
+            keys.append('e:' + DataValidator.normalize_email(email))
+        if phone:
+            digits = DataValidator.normalize_phone(phone)
+            if 10 <= len(digits) <= 15:
+                keys.append('p:' + digits)
+        return [self._hash(k) for k in keys]
+
+    def _next_candidate_id(self) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT value FROM candidate_meta WHERE name = 'next_candidate_id'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def _find(self, key_hashes: List[int]) -> Dict[int, int]:
+        found = {}
+        for i in range(0, len(key_hashes), self._IN_CHUNK):
+            chunk = key_hashes[i:i + self._IN_CHUNK]
+            rows = self._conn.execute(
+                'SELECT key_hash, candidate_id FROM candidate_keys WHERE key_hash IN (%s)'
+                % ','.join('?' * len(chunk)),
+                chunk
+            )
+            found.update(rows)
+        return found
+
+    def lookup(self, email: Optional[str] = None, phone: Optional[str] = None) -> Optional[int]:
+        """Return the id of a known candidate sharing this email or phone"""
+        keys = self.candidate_keys(email, phone)
+        with self._lock:
+            found = self._find(keys)
+        return next((found[k] for k in keys if k in found), None)
+
+    def add(self, email: Optional[str] = None, phone: Optional[str] = None) -> Optional[int]:
+        """Register a candidate and return its id, reusing the id of a known match"""
+        keys = self.candidate_keys(email, phone)
+        if not keys:
+            return None
+        return self.register_batch([keys])[0][0]
+
+    def register_batch(self, keyed: List[List[int]]) -> List[Optional[Tuple[int, bool]]]:
+        """Register candidates given by their key hashes in one transaction.
+
+        Returns (candidate id, is new) per candidate, or None when it has no keys.
+        A candidate matching a known one, or an earlier one in the batch, reuses
+        that id, and any of its keys not yet stored are linked to it.
+        """
+        results = []
+        entries = []
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                known = self._find([key for keys in keyed for key in keys])
+                next_id = start_id = self._next_candidate_id()
+                for keys in keyed:
+                    if not keys:
+                        results.append(None)
+                        continue
+                    candidate_id = next((known[k] for k in keys if k in known), None)
+                    is_new = candidate_id is None
+                    if is_new:
+                        candidate_id = next_id
+                        next_id += 1
+                    results.append((candidate_id, is_new))
+                    for key in keys:
+                        if key not in known:
+                            known[key] = candidate_id
+                            entries.append((key, candidate_id))
+                # Sorted inserts walk the B-tree in order instead of at random
+                self._conn.executemany(
+                    'INSERT INTO candidate_keys (key_hash, candidate_id) VALUES (?, ?)',
+                    sorted(entries)
+                )
+                if next_id != start_id:
+                    self._conn.execute(
+                        "UPDATE candidate_meta SET value = ? WHERE name = 'next_candidate_id'",
+                        (next_id,)
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return results
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CandidateImporter:
+    """Stream candidate records into a CandidateIndex in batches.
+
+    Only one batch is held in memory at a time, and each batch is registered
+    in a single transaction. Records without a valid email or phone are
+    counted as invalid. Records matching an indexed candidate, or an earlier
+    record in the same import, count as duplicates and link any new contact
+    details to that candidate. Set a field name to None to ignore it.
+    """
+
+    def __init__(self, index: CandidateIndex, batch_size: int = 10000,
+                 email_field: Optional[str] = 'email', phone_field: Optional[str] = 'phone'):
+        self.index = index
+        self.batch_size = batch_size
+        self.email_field = email_field
+        self.phone_field = phone_field
+
+    def import_csv(self, path: str) -> Dict[str, float]:
+        """Import candidates from a CSV file with a header row"""
+        # utf-8-sig drops the BOM that Excel puts in front of the first header
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            missing = [field for field in (self.email_field, self.phone_field)
+                       if field and field not in fieldnames]
+            if missing:
+                raise ValueError(f"CSV {path} is missing column(s): {', '.join(missing)}")
+            return self.import_records(reader)
+
+    def import_records(self, records: Iterable[Dict[str, str]]) -> Dict[str, float]:
+        """Import candidate dicts and return dedup statistics"""
+        stats = {'total': 0, 'invalid': 0, 'duplicates': 0, 'imported': 0}
+        for batch in self._batches(records):
+            self._import_batch(batch, stats)
+        valid = stats['total'] - stats['invalid']
+        stats['dedup_rate'] = stats['duplicates'] / valid if valid else 0.0
+        return stats
+
+    def _batches(self, records: Iterable[Dict[str, str]]) -> Iterator[List[Dict[str, str]]]:
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _import_batch(self, batch: List[Dict[str, str]], stats: Dict[str, int]):
+        keyed = [
+            self.index.candidate_keys(
+                record.get(self.email_field) if self.email_field else None,
+                record.get(self.phone_field) if self.phone_field else None
+            )
+            for record in batch
+        ]
+        stats['total'] += len(batch)
+        for result in self.index.register_batch(keyed):
+            if result is None:
+                stats['invalid'] += 1
+            elif result[1]:
+                stats['imported'] += 1
+            else:
+                stats['duplicates'] += 1
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# chatbot.py imports its sibling modules by bare name, as when run by Streamlit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
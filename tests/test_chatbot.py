@@ -0,0 +1,163 @@
+import pytest
+from chatbot import HiringAssistant
+from utils import CandidateIndex, QuestionIndex
+
+ISSUED = [
+    "How would you design a REST API in Django that handles pagination for large querysets?",
+    "What is the difference between a list and a tuple in Python?",
+    "How do you prevent N+1 queries when using the Django ORM?",
+    "Explain how React decides when to re-render a component.",
+]
+
+@pytest.fixture
+def assistant(monkeypatch):
+    index = QuestionIndex()
+    index.add_many(ISSUED)
+    monkeypatch.setattr(HiringAssistant, "question_index", index)
+    monkeypatch.delenv("QUESTION_INDEX_PATH", raising=False)
+    bot = HiringAssistant()
+    bot.ollama_available = False
+    return bot
+
+def test_diversify_questions_drops_repeats_and_renumbers(assistant):
+    questions = (
+        "Here are some technical questions based on your background:\n\n"
+        "1. How would you design a REST API in Django which handles pagination for very large querysets?\n"
+        "2. What are Python decorators and when would you write one?\n"
+        "3. How does PostgreSQL decide whether to use an index for a query?\n"
+        "4. Describe how you would structure background jobs with Celery.\n\n"
+        "Good luck!"
+    )
+    result = assistant.diversify_questions(questions)
+    assert result == (
+        "Here are some technical questions based on your background:\n\n"
+        "1. What are Python decorators and when would you write one?\n"
+        "2. How does PostgreSQL decide whether to use an index for a query?\n"
+        "3. Describe how you would structure background jobs with Celery.\n\n"
+        "Good luck!"
+    )
+    assert len(HiringAssistant.question_index) == len(ISSUED) + 3
+
+def test_diversify_questions_skips_repeats_within_a_set(assistant):
+    questions = (
+        "1. What are Python decorators and when would you write one?\n"
+        "2. What are Python decorators and when should you write one?\n"
+        "3. How does PostgreSQL decide whether to use an index for a query?"
+    )
+    result = assistant.diversify_questions(questions)
+    assert result == (
+        "1. What are Python decorators and when would you write one?\n"
+        "2. How does PostgreSQL decide whether to use an index for a query?"
+    )
+
+def test_diversify_questions_keeps_all_repeats_without_reindexing(assistant):
+    questions = "Questions:\n\n" + "\n\n".join(
+        f"{n}. {q}" for n, q in enumerate(reversed(ISSUED), 1)
+    ) + "\n\nGood luck!"
+    assert assistant.diversify_questions(questions) == questions
+    assert len(HiringAssistant.question_index) == len(ISSUED)
+
+def test_diversify_questions_keeps_multiline_questions(assistant):
+    python_set = (
+        "Here are some technical questions based on your background:\n\n"
+        "1. **Conceptual Question**\n"
+        "   What is the difference between a process and a thread in Python,\n"
+        "   and how does the GIL affect each?\n\n"
+        "2. **Practical Scenario**\n"
+        "   How would you debug a memory leak in a long-running Django worker?\n\n"
+        "3. **Experience Question**\n"
+        "   Which PostgreSQL features have you relied on for data integrity?\n\n"
+        "Good luck!"
+    )
+    assert assistant.diversify_questions(python_set) == python_set
+
+    java_set = (
+        "1. **Conceptual Question**\n"
+        "   How does the Spring container resolve circular bean dependencies?\n"
+        "2. **Practical Scenario**\n"
+        "   How would you handle a Kafka consumer that keeps falling behind?\n"
+        "3. **Experience Question**\n"
+        "   When have you tuned JVM garbage collection in production?"
+    )
+    assert assistant.diversify_questions(java_set) == java_set
+    assert len(HiringAssistant.question_index) == len(ISSUED) + 6
+
+def test_diversify_questions_tops_up_to_minimum(assistant):
+    questions = "\n".join(f"{n}. {q}" for n, q in enumerate(ISSUED[:3], 1))
+    questions += "\n4. What are Python decorators and when would you write one?"
+    result = assistant.diversify_questions(questions).split("\n")
+    assert len(result) == HiringAssistant.MIN_QUESTIONS
+    assert result[0] == "1. What are Python decorators and when would you write one?"
+
+def test_diversify_questions_requests_replacements(assistant, monkeypatch):
+    assistant.ollama_available = True
+    replacements = (
+        "1. How would you profile a slow Flask endpoint?\n"
+        "2. When would you choose Redis over PostgreSQL for caching?\n"
+        "3. How would you secure JWT authentication in a single-page app?"
+    )
+    monkeypatch.setattr("chatbot.ollama.chat", lambda **kwargs: {"message": {"content": replacements}})
+    questions = "\n".join(f"{n}. {q}" for n, q in enumerate(ISSUED[:3], 1))
+    questions += "\n4. What are Python decorators and when would you write one?"
+    result = assistant.diversify_questions(questions)
+    assert result == (
+        "1. What are Python decorators and when would you write one?\n"
+        "2. How would you profile a slow Flask endpoint?\n"
+        "3. When would you choose Redis over PostgreSQL for caching?\n"
+        "4. How would you secure JWT authentication in a single-page app?"
+    )
+
+def test_issued_questions_are_saved_periodically(assistant, monkeypatch, tmp_path):
+    path = str(tmp_path / "questions.npz")
+    monkeypatch.setenv("QUESTION_INDEX_PATH", path)
+    monkeypatch.setattr(HiringAssistant, "QUESTION_INDEX_SAVE_EVERY", 2)
+    monkeypatch.setattr(HiringAssistant, "_questions_since_save", 0)
+    assistant.diversify_questions("1. What are Python decorators and when would you write one?")
+    assistant.diversify_questions("1. How does PostgreSQL decide whether to use an index for a query?")
+    assert len(QuestionIndex.load(path)) == len(ISSUED) + 2
+
+@pytest.fixture
+def screening(assistant, monkeypatch):
+    monkeypatch.setattr(HiringAssistant, "candidate_index", CandidateIndex())
+    monkeypatch.setattr(assistant, "extract_candidate_information",
+                        lambda user_input: "Name: Jane Doe\nEmail: jane@example.com\n"
+                                           "5 years experience with Python and Django")
+    monkeypatch.setattr(assistant, "generate_tech_questions", lambda: "1. What is the GIL in Python?")
+    assistant.ollama_available = True
+    assistant.conversation_state = "collecting_info"
+    return assistant
+
+def test_candidate_registered_only_after_screening(screening):
+    assert not screening.is_known_candidate()
+    assert "What is the GIL" in screening.process_message("I'm Jane, jane@example.com")
+    assert screening.conversation_state == "tech_questions"
+    assert not screening.is_known_candidate()
+
+    screening.process_message("The GIL serializes bytecode execution.")
+    assert screening.conversation_state == "completed"
+    assert screening.is_known_candidate()
+
+def test_known_candidate_skips_screening(screening):
+    HiringAssistant.candidate_index.add(email="Jane+referral@Example.com")
+    complete = screening.prompts.get_screening_complete_prompt()
+    assert screening.process_message("I'm Jane, jane@example.com") == complete
+    assert screening.conversation_state == "completed"
+    assert screening.process_message("Can I continue?") == complete
+
+def test_partial_info_matching_a_known_candidate_continues(screening, monkeypatch):
+    HiringAssistant.candidate_index.add(email="jane@example.com")
+    monkeypatch.setattr(screening, "extract_candidate_information",
+                        lambda user_input: "Email: jane@example.com")
+    response = screening.process_message("jane@example.com")
+    assert screening.conversation_state == "collecting_info"
+    assert response != screening.prompts.get_screening_complete_prompt()
+
+def test_candidate_index_is_opened_from_env(monkeypatch, tmp_path):
+    path = str(tmp_path / "candidates.db")
+    CandidateIndex(path, key="secret").add(phone="+1 (555) 123-4567")
+    monkeypatch.setattr(HiringAssistant, "candidate_index", None)
+    monkeypatch.setenv("CANDIDATE_INDEX_PATH", path)
+    monkeypatch.setenv("CANDIDATE_INDEX_KEY", "secret")
+    bot = HiringAssistant()
+    bot.candidate_info["phone"] = "15551234567"
+    assert bot.is_known_candidate()
@@ -1,9 +1,95 @@
+import threading
+
 import pytest
-from src.utils import DataValidator
+from src.utils import CandidateIndex, CandidateImporter, DataValidator, QuestionIndex
 
 @pytest.mark.parametrize("email,expected", [
     ("john@example.com", True),
     ("wrong@", False)
 ])
 def test_email_validator(email, expected):
-    assert DataValidator.is_valid_email(email) == expected
\ No newline at end of file
+    assert DataValidator.is_valid_email(email) == expected
+
+def test_question_index_flags_near_duplicates():
+    index = QuestionIndex()
+    index.add("How would you design a REST API in Django that handles pagination for large querysets?")
+    assert index.is_duplicate("How would you design a REST API in Django which handles pagination for very large querysets?")
+    assert not index.is_duplicate("Explain the virtual DOM in React and how reconciliation works.")
+
+def test_question_index_save_and_load(tmp_path):
+    index = QuestionIndex()
+    index.add_many(["What is the GIL in Python?", "Explain React hooks and when useEffect runs."])
+    path = str(tmp_path / "questions.npz")
+    index.save(path)
+    restored = QuestionIndex.load(path)
+    assert len(restored) == 2
+    assert restored.is_duplicate("What is the GIL in Python?")
+
+def test_contact_normalization():
+    assert DataValidator.normalize_email(" John.Doe+linkedin@Example.COM ") == "john.doe@example.com"
+    assert DataValidator.normalize_email("+alice@x.com") == "+alice@x.com"
+    index = CandidateIndex()
+    assert index.add(email="+alice@x.com") != index.add(email="+bob@x.com")
+    assert DataValidator.normalize_phone("+1 (555) 123-4567") == "15551234567"
+
+def test_candidate_importer_dedups_across_sources():
+    index = CandidateIndex()
+    records = [
+        {"email": "jane@example.com", "phone": "555-123-4567"},
+        {"email": "JANE+indeed@example.com", "phone": ""},
+        {"email": "other@example.com", "phone": "(555) 123 4567"},
+        {"email": "bob@example.com", "phone": "5559876543"},
+        {"email": "not-an-email", "phone": "123"},
+    ]
+    stats = CandidateImporter(index, batch_size=2).import_records(records)
+    assert stats["total"] == 5
+    assert stats["invalid"] == 1
+    assert stats["duplicates"] == 2
+    assert stats["imported"] == 2
+    assert stats["dedup_rate"] == 0.5
+    assert index.lookup(email="Bob+x@Example.com") == index.lookup(phone="555 987 6543")
+
+def test_candidate_importer_reads_excel_bom_csv(tmp_path):
+    path = tmp_path / "candidates.csv"
+    path.write_text("email,phone\na@b.com,\nA+x@b.com,\n", encoding="utf-8-sig")
+    stats = CandidateImporter(CandidateIndex()).import_csv(str(path))
+    assert (stats["imported"], stats["invalid"], stats["duplicates"]) == (1, 0, 1)
+
+def test_candidate_importer_rejects_missing_columns(tmp_path):
+    path = tmp_path / "candidates.csv"
+    path.write_text("e-mail,phone\na@b.com,5551234567\n")
+    with pytest.raises(ValueError, match="email"):
+        CandidateImporter(CandidateIndex()).import_csv(str(path))
+    stats = CandidateImporter(CandidateIndex(), email_field=None).import_csv(str(path))
+    assert stats["imported"] == 1
+
+def test_candidate_index_ids_are_unique_across_threads_and_reopen(tmp_path):
+    path = str(tmp_path / "candidates.db")
+    index = CandidateIndex(path)
+    ids = []
+    def add_range(start):
+        for i in range(start, start + 50):
+            ids.append(index.add(email=f"user{i}@example.com"))
+    threads = [threading.Thread(target=add_range, args=(n * 50,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(ids) == list(range(200))
+    index.close()
+
+    reopened = CandidateIndex(path)
+    assert len(reopened) == 200
+    assert reopened.add(email="USER7+x@example.com") == reopened.lookup(email="user7@example.com")
+    assert reopened.add(email="new@example.com") == 200
+
+def test_candidate_index_keys_depend_on_secret(tmp_path):
+    path = str(tmp_path / "candidates.db")
+    index = CandidateIndex(path, key="secret")
+    assert index.candidate_keys(phone="5551234567") != CandidateIndex().candidate_keys(phone="5551234567")
+    index.add(phone="5551234567")
+    index.close()
+
+    assert CandidateIndex(path, key="secret").lookup(phone="(555) 123-4567") == 0
+    with pytest.raises(ValueError, match="different key"):
+        CandidateIndex(path, key="other")